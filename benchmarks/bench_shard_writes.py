@@ -0,0 +1,60 @@
+"""
+Aggregate write throughput of per-user SQLite shards.
+
+For each shard count N, N users write cards concurrently (one thread per
+user) through a ShardRouter, and the total cards/second is reported.
+
+    python -m benchmarks.bench_shard_writes --cards 200 --shards 1 2 4 8 16
+"""
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.card_model import Card, Envelope
+from src.shard_router import ShardRouter
+
+
+def write_cards(router: ShardRouter, user_id: str, n_cards: int):
+    with router.session(user_id) as db:
+        env_id = db.add_envelope(Envelope(name="Benchmark"))
+        for i in range(n_cards):
+            db.add_card(Card(
+                description=f"Benchmark note {i} for {user_id}",
+                card_type="Task",
+                date_text=None,
+                date_parsed=None,
+                assignee=None,
+                context_keywords=["benchmark"],
+                envelope_id=env_id
+            ))
+
+
+def run(n_shards: int, n_cards: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        router = ShardRouter(shard_dir=tmp, max_open=n_shards, idle_timeout=None)
+        users = [f"user{i}" for i in range(n_shards)]
+        for u in users:
+            with router.session(u):  # open shards up front so only writes are timed
+                pass
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_shards) as pool:
+            list(pool.map(lambda u: write_cards(router, u, n_cards), users))
+        elapsed = time.perf_counter() - start
+        router.close_all()
+    return n_shards * n_cards / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cards", type=int, default=200, help="cards written per user")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    print(f"{'shards':>6}  {'cards':>7}  {'cards/s':>10}")
+    for n in args.shards:
+        rate = run(n, args.cards)
+        print(f"{n:>6}  {n * args.cards:>7}  {rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,29 @@ from src.card_model import Card, Envelope
 DB_PATH = Path(__file__).resolve().parents[1] / "data" / "assistant.db"
 
 class DBManager:
+    """
+    SQLite access for Cards, Envelopes and UserContext.
+
+    Envelope and context reads are cached in memory and only invalidated by
+    writes made through this instance, so at most one open DBManager should
+    write to a given file at a time (ShardRouter enforces this per shard).
+    """
+
     def __init__(self, db_path: Optional[str] = None):
         db_file = db_path if db_path else str(DB_PATH)
         Path(db_file).resolve().parents[0].mkdir(parents=True, exist_ok=True)
         self.conn = sqlite3.connect(db_file, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
+        # Read caches kept warm while the manager stays open
+        self._envelope_cache: Optional[List[dict]] = None
+        self._context_cache: dict = {}
         self.create_tables()
 
+    def close(self):
+        self.conn.close()
+        self._envelope_cache = None
+        self._context_cache = {}
+
     def create_tables(self):
         c = self.conn.cursor()
         # Envelopes
@@ -53,12 +69,15 @@ class DBManager:
         c.execute("INSERT INTO Envelopes (name, description) VALUES (?, ?)",
                   (envelope.name, envelope.description))
         self.conn.commit()
+        self._envelope_cache = None
         return c.lastrowid
 
     def get_all_envelopes(self) -> List[dict]:
-        c = self.conn.cursor()
-        c.execute("SELECT * FROM Envelopes ORDER BY created_at DESC")
-        return [dict(r) for r in c.fetchall()]
+        if self._envelope_cache is None:
+            c = self.conn.cursor()
+            c.execute("SELECT * FROM Envelopes ORDER BY created_at DESC")
+            self._envelope_cache = [dict(r) for r in c.fetchall()]
+        return [dict(e) for e in self._envelope_cache]
 
     def get_envelope_by_id(self, eid: int) -> Optional[dict]:
         c = self.conn.cursor()
@@ -115,9 +134,15 @@ class DBManager:
         ON CONFLICT(key) DO UPDATE SET value=excluded.value, updated_at=CURRENT_TIMESTAMP
         """, (key, value))
         self.conn.commit()
+        self._context_cache[key] = value
 
     def get_context(self, key: str) -> Optional[str]:
+        if key in self._context_cache:
+            return self._context_cache[key]
         c = self.conn.cursor()
         c.execute("SELECT value FROM UserContext WHERE key = ?", (key,))
         row = c.fetchone()
-        return row['value'] if row else None
+        value = row['value'] if row else None
+        if value is not None:
+            self._context_cache[key] = value
+        return value
@@ -3,6 +3,8 @@ from langchain.prompts import PromptTemplate
 from langchain.llms import HuggingFacePipeline
 from transformers import pipeline
 import json
+from typing import Optional
+from src.db_manager import DBManager
 from src.ingestion_agent import IngestionAgent
 
 # --- Use local Hugging Face model (causal LM) ---
@@ -34,13 +36,11 @@ Note:
 """
 )
 
-# --- Core agent logic (existing) ---
-core_agent = IngestionAgent()
-
 class LangChainIngestionAgent:
-    def __init__(self):
+    def __init__(self, db: Optional[DBManager] = None):
         self.chain = LLMChain(llm=llm, prompt=PROMPT)
-        self.core_agent = core_agent
+        # --- Core agent logic (existing), bound to this agent's database ---
+        self.core_agent = IngestionAgent(db)
 
     # def process_note(self, note: str):
     #     """
@@ -0,0 +1,201 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+from src.db_manager import DBManager, DB_PATH
+
+SHARD_DIR = Path(__file__).resolve().parents[1] / "data" / "shards"
+SHARD_GLOB = "user_*.db"
+
+class _Shard:
+    """Pool entry: one open DBManager plus its pin count and usage lock."""
+
+    def __init__(self):
+        self.db: Optional[DBManager] = None
+        self.error: Optional[BaseException] = None
+        # Set once the opening thread has filled in db (or error)
+        self.ready = threading.Event()
+        self.refs = 0
+        self.last_used = time.monotonic()
+        # Serializes use of the shared sqlite3 connection between threads
+        self.lock = threading.RLock()
+
+class ShardRouter:
+    """
+    Route each user to their own SQLite file and keep a bounded LRU pool of
+    open DBManager instances, so envelope/context caches stay warm for
+    active users while idle shards are closed and reopened lazily.
+
+    The router is the only owner of a shard's DBManager: every access,
+    scatter_gather included, goes through session(), which pins the pooled
+    instance and holds its lock. Pinned shards are never closed; if all
+    entries are pinned the pool may briefly exceed max_open and is trimmed
+    on release. Opening and closing files happens outside the pool lock, so
+    a cold shard does not stall sessions on warm ones.
+
+    default_user, if given, is routed to the legacy single-file DB_PATH so
+    data stored before sharding stays visible to that user.
+    """
+
+    def __init__(
+        self,
+        shard_dir: Optional[Union[str, Path]] = None,
+        max_open: int = 32,
+        idle_timeout: Optional[float] = 600.0,
+        default_user: Optional[str] = None
+    ):
+        self.shard_dir = Path(shard_dir) if shard_dir else SHARD_DIR
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        self.max_open = max(1, max_open)
+        self.idle_timeout = idle_timeout
+        self.default_user = default_user
+        # shard path -> _Shard, least recently used first
+        self._pool: "OrderedDict[str, _Shard]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def shard_path(self, user_id: str) -> Path:
+        """Stable file path for a user: readable slug plus a hash to avoid collisions."""
+        user_id = str(user_id)
+        if self.default_user is not None and user_id == self.default_user:
+            return DB_PATH
+        slug = re.sub(r"[^A-Za-z0-9_-]", "_", user_id)[:32]
+        digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:10]
+        return self.shard_dir / f"user_{slug}_{digest}.db"
+
+    @contextmanager
+    def session(self, user_id: str) -> Iterator[DBManager]:
+        """
+        Pin the user's shard and hold its lock for the duration of the block.
+        The yielded DBManager must not be used after the block exits.
+        """
+        shard = self._acquire(str(self.shard_path(user_id)), str(user_id))
+        try:
+            with shard.lock:
+                yield shard.db
+        finally:
+            self._release(shard)
+
+    def _acquire(self, path: str, user_id: Optional[str] = None, touch: bool = True) -> _Shard:
+        with self._lock:
+            stale = self._close_idle_locked()
+            shard = self._pool.get(path)
+            opener = shard is None
+            if opener:
+                # Placeholder: concurrent callers for this path wait on ready
+                shard = _Shard()
+                self._pool[path] = shard
+                if not touch:
+                    # Admin scans enter at the cold end so they are evicted first
+                    self._pool.move_to_end(path, last=False)
+            if touch:
+                self._pool.move_to_end(path)
+                shard.last_used = time.monotonic()
+            shard.refs += 1
+            if touch:
+                stale += self._trim_locked()
+        self._close(stale)
+
+        if opener:
+            try:
+                db = DBManager(path)
+                if user_id is not None and db.get_context("user_id") is None:
+                    db.update_context("user_id", user_id)
+                shard.db = db
+            except BaseException as e:
+                shard.error = e
+                with self._lock:
+                    if self._pool.get(path) is shard:
+                        del self._pool[path]
+                raise
+            finally:
+                shard.ready.set()
+        else:
+            shard.ready.wait()
+            if shard.error is not None:
+                with self._lock:
+                    shard.refs -= 1
+                raise shard.error
+        return shard
+
+    def _release(self, shard: _Shard):
+        with self._lock:
+            if shard.refs <= 0:
+                raise RuntimeError("Shard released more times than it was acquired")
+            shard.refs -= 1
+            shard.last_used = time.monotonic()
+            stale = self._trim_locked()
+        self._close(stale)
+
+    def _trim_locked(self) -> List[DBManager]:
+        """Drop least recently used unpinned shards until within max_open; caller closes them."""
+        excess = len(self._pool) - self.max_open
+        if excess <= 0:
+            return []
+        paths = [p for p, s in self._pool.items() if s.refs == 0][:excess]
+        return [self._pool.pop(p).db for p in paths]
+
+    def _close_idle_locked(self, max_idle: Optional[float] = None) -> List[DBManager]:
+        limit = self.idle_timeout if max_idle is None else max_idle
+        if limit is None:
+            return []
+        now = time.monotonic()
+        paths = [p for p, s in self._pool.items() if s.refs == 0 and now - s.last_used > limit]
+        return [self._pool.pop(p).db for p in paths]
+
+    @staticmethod
+    def _close(dbs: List[DBManager]):
+        for db in dbs:
+            db.close()
+
+    def close_idle(self, max_idle: Optional[float] = None) -> int:
+        """Close unpinned shards unused for longer than max_idle seconds. Returns how many were closed."""
+        with self._lock:
+            stale = self._close_idle_locked(max_idle)
+        self._close(stale)
+        return len(stale)
+
+    def close_all(self):
+        """Close every unpinned shard."""
+        with self._lock:
+            paths = [p for p, s in self._pool.items() if s.refs == 0]
+            stale = [self._pool.pop(p).db for p in paths]
+        self._close(stale)
+
+    def open_count(self) -> int:
+        with self._lock:
+            return len(self._pool)
+
+    def scatter_gather(
+        self,
+        query: Callable[[DBManager], Any],
+        max_workers: int = 8
+    ) -> Dict[str, Any]:
+        """
+        Run query(db) against every shard on disk and return {user_id: result}.
+        Each query runs on the pooled DBManager while holding that shard's
+        lock. Shards that were not open are added at the cold end of the LRU,
+        so admin scans do not push active users out of the pool.
+        """
+        paths = [str(p) for p in self.shard_dir.glob(SHARD_GLOB)]
+        if self.default_user is not None and DB_PATH.exists():
+            paths.append(str(DB_PATH))
+        paths.sort()
+
+        def run(path: str):
+            shard = self._acquire(path, touch=False)
+            try:
+                with shard.lock:
+                    db = shard.db
+                    return db.get_context("user_id") or Path(path).stem, query(db)
+            finally:
+                self._release(shard)
+
+        if not paths:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(paths)))) as pool:
+            return dict(pool.map(run, paths))
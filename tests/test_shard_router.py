@@ -0,0 +1,185 @@
+import sqlite3
+import threading
+import time
+import pytest
+from src import shard_router
+from src.card_model import Envelope
+from src.shard_router import ShardRouter
+
+
+@pytest.fixture
+def router(tmp_path):
+    r = ShardRouter(shard_dir=tmp_path, max_open=2, idle_timeout=None)
+    yield r
+    r.close_all()
+
+
+def open_users(router):
+    with router._lock:
+        return [s.db.get_context("user_id") for s in router._pool.values()]
+
+
+def test_shard_path_is_stable_and_collision_free(router, tmp_path):
+    assert router.shard_path("alice") == router.shard_path("alice")
+    assert router.shard_path("alice").parent == tmp_path
+    # Same slug after sanitizing, different users -> different files
+    assert router.shard_path("a/b") != router.shard_path("a_b")
+    assert router.shard_path("a/b").name.startswith("user_a_b_")
+
+
+def test_lru_evicts_least_recently_used(router):
+    for user in ["alice", "bob"]:
+        with router.session(user):
+            pass
+    with router.session("alice"):  # alice becomes most recent
+        pass
+    with router.session("carol"):
+        pass
+    assert open_users(router) == ["alice", "carol"]
+    assert router.open_count() == 2
+
+
+def test_pinned_shard_is_not_closed_by_eviction(tmp_path):
+    router = ShardRouter(shard_dir=tmp_path, max_open=1, idle_timeout=None)
+    with router.session("alice") as alice:
+        with router.session("bob") as bob:
+            bob.add_envelope(Envelope(name="Bob"))
+        # alice was pinned, so bob's shard was the one closed
+        assert alice.get_all_envelopes() == []
+        assert open_users(router) == ["alice"]
+    router.close_all()
+    assert router.open_count() == 0
+
+
+def test_session_holds_shard_lock(router):
+    with router.session("alice"):
+        shard = router._pool[str(router.shard_path("alice"))]
+        assert shard.lock._is_owned()
+    assert not shard.lock._is_owned()
+
+
+def test_release_without_acquire_raises(router):
+    with router.session("alice"):
+        shard = router._pool[str(router.shard_path("alice"))]
+    with pytest.raises(RuntimeError):
+        router._release(shard)
+    assert shard.refs == 0
+    router.close_all()
+    assert router.open_count() == 0
+
+
+def test_idle_time_counts_from_release(tmp_path):
+    router = ShardRouter(shard_dir=tmp_path, max_open=4, idle_timeout=0.2)
+    with router.session("alice"):
+        time.sleep(0.3)
+    with router.session("bob"):
+        pass
+    assert "alice" in open_users(router)
+    router.close_all()
+
+
+def test_cold_open_does_not_block_warm_sessions(tmp_path, monkeypatch):
+    router = ShardRouter(shard_dir=tmp_path, max_open=4, idle_timeout=None)
+    with router.session("alice"):
+        pass
+    opening, proceed = threading.Event(), threading.Event()
+    real_init = shard_router.DBManager.__init__
+
+    def slow_init(self, db_path=None):
+        opening.set()
+        proceed.wait(5)
+        real_init(self, db_path)
+
+    def open_cold():
+        with router.session("bob"):
+            pass
+
+    monkeypatch.setattr(shard_router.DBManager, "__init__", slow_init)
+    cold = threading.Thread(target=open_cold)
+    cold.start()
+    assert opening.wait(5)
+    # bob is still opening, but alice's warm shard is usable meanwhile
+    with router.session("alice") as db:
+        db.add_envelope(Envelope(name="Warm"))
+    proceed.set()
+    cold.join()
+    router.close_all()
+    assert router.open_count() == 0
+
+
+def test_default_user_maps_to_legacy_db(tmp_path, monkeypatch):
+    legacy = tmp_path / "assistant.db"
+    monkeypatch.setattr(shard_router, "DB_PATH", legacy)
+    router = ShardRouter(shard_dir=tmp_path / "shards", default_user="default")
+    assert router.shard_path("default") == legacy
+    with router.session("default") as db:
+        db.add_envelope(Envelope(name="Old note"))
+    with router.session("alice") as db:
+        db.add_envelope(Envelope(name="New note"))
+    result = router.scatter_gather(lambda db: [e["name"] for e in db.get_all_envelopes()])
+    assert result == {"default": ["Old note"], "alice": ["New note"]}
+    router.close_all()
+
+
+def test_close_idle_and_lazy_reopen(router):
+    with router.session("alice") as db:
+        db.add_envelope(Envelope(name="Budget"))
+    assert router.close_idle(0) == 1
+    assert router.open_count() == 0
+    with router.session("alice") as db:
+        assert [e["name"] for e in db.get_all_envelopes()] == ["Budget"]
+
+
+def test_close_idle_skips_pinned(router):
+    with router.session("alice") as db:
+        assert router.close_idle(0) == 0
+        db.add_envelope(Envelope(name="Still open"))
+
+
+def test_scatter_gather_covers_closed_shards(router):
+    for user in ["alice", "bob", "carol", "a/b"]:
+        with router.session(user) as db:
+            db.add_envelope(Envelope(name=user))
+    assert router.open_count() == 2
+
+    result = router.scatter_gather(lambda db: [e["name"] for e in db.get_all_envelopes()])
+
+    assert result == {u: [u] for u in ["alice", "bob", "carol", "a/b"]}
+    assert router.open_count() <= 2
+
+
+def test_scatter_gather_does_not_evict_active_users(router):
+    for user in ["alice", "bob", "carol"]:
+        with router.session(user):
+            pass
+    before = open_users(router)
+    router.scatter_gather(lambda db: None)
+    assert open_users(router) == before
+
+
+def test_concurrent_sessions_never_use_closed_db(tmp_path):
+    router = ShardRouter(shard_dir=tmp_path, max_open=1, idle_timeout=0)
+    errors = []
+
+    def worker(user):
+        try:
+            for i in range(50):
+                with router.session(user) as db:
+                    db.add_envelope(Envelope(name=f"{user}-{i}"))
+                    db.get_all_envelopes()
+        except sqlite3.ProgrammingError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(u,)) for u in ["alice", "bob", "carol", "dave"]]
+    for t in threads:
+        t.start()
+    scan = router.scatter_gather(lambda db: len(db.get_all_envelopes()))
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert set(scan) <= {"alice", "bob", "carol", "dave"}
+    assert router.scatter_gather(lambda db: len(db.get_all_envelopes())) == {
+        u: 50 for u in ["alice", "bob", "carol", "dave"]
+    }
+    router.close_all()